@@ -54,6 +54,7 @@ class Config:
     pushbullet_encryption_key: str = ''
     pushover_user: str = ''
     pushover_token: str = ''
+    metrics_textfile: Path | None = None
     sources: List[SourceConfig] = []
 
     @classmethod
@@ -93,6 +94,8 @@ class Config:
             cls.pushbullet_encryption_key = config_file["general"]["pushbullet_encryption_key"].strip()
             cls.pushover_user = config_file["general"]["pushover_user"].strip()
             cls.pushover_token = config_file["general"]["pushover_token"].strip()
+            metrics_textfile = config_file["general"].get("metrics_textfile", "").strip()
+            cls.metrics_textfile = Path(metrics_textfile) if metrics_textfile else None
 
             # Storage settings
             cls.private_storage_paths = extract_paths(config_file["storage"]["private_storage_paths"])
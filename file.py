@@ -1,6 +1,7 @@
 import logging
 import os
 import shutil
+import subprocess
 import dateutil.parser as dparser
 from datetime import datetime
 from pathlib import Path
@@ -11,6 +12,7 @@ from PIL import Image, ExifTags
 
 from config import Config, SourceConfig
 from dated_folder import DatedFolder
+from metrics import Metrics
 
 LOGGER = logging.getLogger(__name__)
 
@@ -27,6 +29,11 @@ class File:
 
     def get_date_from_name(self) -> datetime | None:
         """Attempt to get the file creation date from its name"""
+        with Metrics.time("photosort_date_extraction_seconds", method="filename"):
+            return self.__parse_date_from_name()
+
+    def __parse_date_from_name(self) -> datetime | None:
+        """Parse the filename looking for a date"""
         try:
             return dparser.parse(self.filename, fuzzy=True)
         except ValueError:
@@ -86,6 +93,8 @@ class File:
         """
         if not Config.test_mode:
             try:
+                # Read the size first, the source file is gone once moved
+                size = self.path.stat().st_size
                 match Config.operation_type.lower():
                     # Copy and move are available in pathlib in 3.14
                     case "copy":
@@ -95,10 +104,12 @@ class File:
                     case "link":
                         (dst / self.path.name).hardlink_to(self.path)
                     case "reflink":
-                        os.system(f"cp --reflink '{str(self.path)}' '{str(dst)}'")
+                        # Raise on failure so the file isn't reported as handled
+                        subprocess.run(["cp", "--reflink", str(self.path), str(dst)], check=True)
                     case _:
                         raise ValueError(f"{Config.operation_type} operation not supported")
 
+                Metrics.inc("photosort_bytes_transferred_total", size, operation=Config.operation_type.lower())
                 LOGGER.info(f"{Config.operation_type}ed '{self.filename}' to '{dst}'")
             except Exception as error:
                 LOGGER.error(f"{Config.operation_type} '{self.filename}' to '{dst}': {error}")
@@ -168,8 +179,9 @@ class Photo(File):
         # f = open(file, 'rb')
         # tags = exifread.process_file(f)
         try:
-            img = Image.open(self.path)
-            img_exif = img.getexif()
+            with Metrics.time("photosort_date_extraction_seconds", method="exif"):
+                img = Image.open(self.path)
+                img_exif = img.getexif()
             if img_exif:
                 exif = {ExifTags.TAGS[k]: v for k, v in img_exif.items() if k in ExifTags.TAGS}
                 for key in self.data_keys:
@@ -190,7 +202,8 @@ class Video(File):
     def get_date_from_metadata(self) -> datetime | None:
         """Attempt to get the video creation date from metadata"""
         try:
-            vid = ffmpeg.probe(self.path)['streams']
+            with Metrics.time("photosort_date_extraction_seconds", method="ffprobe"):
+                vid = ffmpeg.probe(self.path)['streams']
             for key in self.data_keys:
                 if key in vid[0]['tags']:
                     return datetime.strptime(vid[0]['tags'].get(key).split('T')[0], "%Y-%m-%d")
@@ -2,6 +2,7 @@ import socket
 import sys
 import logging
 import os
+import time
 from datetime import datetime
 from typing import List
 
@@ -11,6 +12,7 @@ from config import Config, SourceConfig
 from dated_folder import DatedFolder
 
 from file import File
+from metrics import Metrics
 from notification.notifier import Notifier
 
 LOGGER = logging.getLogger(__name__)
@@ -40,10 +42,14 @@ def sort_source(source: SourceConfig, dir_list: List[DatedFolder]):
                 unsortable_count += 1
                 LOGGER.error(f"Unsortable file '{name}'")
 
+    Metrics.inc("photosort_files_scanned_total", count, source=source.name)
+    Metrics.inc("photosort_files_sorted_total", sorted_count, source=source.name)
+    Metrics.inc("photosort_files_unsortable_total", unsortable_count, source=source.name)
     return count, sorted_count, unsortable_count
 
 
 def main():
+    start = time.monotonic()
     Config.init()
     File.data_keys = Config.data_keys
 
@@ -80,6 +86,11 @@ def main():
     LOGGER.info(execution_report)
     LOGGER.info(f"Execution end at {datetime.now()}")
 
+    if Config.metrics_textfile is not None:
+        Metrics.set("photosort_last_run_duration_seconds", time.monotonic() - start)
+        Metrics.set("photosort_last_run_timestamp_seconds", time.time())
+        Metrics.write_textfile(Config.metrics_textfile)
+
 
 # MAIN
 if __name__ == '__main__':
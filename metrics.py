@@ -0,0 +1,211 @@
+import bisect
+import logging
+import os
+import re
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+LOGGER = logging.getLogger(__name__)
+
+# Upper bounds (in seconds) of the date extraction latency histogram buckets
+LATENCY_BUCKETS = [0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0]
+
+# Counters and histograms are totals over every run, accumulated on top of the previous textfile
+HELP = {
+    "photosort_files_scanned_total": ("counter", "Files found in a source folder, total over all runs"),
+    "photosort_files_sorted_total": ("counter", "Files sorted into a storage folder, total over all runs"),
+    "photosort_files_unsortable_total": ("counter", "Files that could not be sorted, total over all runs"),
+    "photosort_bytes_transferred_total": (
+        "counter",
+        "Size of the files placed in storage folders per operation type, total over all runs "
+        "(link and reflink share data with the source instead of copying it)"
+    ),
+    "photosort_date_extraction_seconds": (
+        "histogram", "Time spent extracting a file date per method, total over all runs"
+    ),
+    "photosort_last_run_duration_seconds": ("gauge", "Duration of the last run"),
+    "photosort_last_run_timestamp_seconds": ("gauge", "Unix time at the end of the last run"),
+}
+
+SAMPLE_PATTERN = re.compile(r'^([a-zA-Z_:][a-zA-Z0-9_:]*)(?:\{(.*)\})?\s+(\S+)$')
+LABEL_PATTERN = re.compile(r'([a-zA-Z_][a-zA-Z0-9_]*)="((?:[^"\\]|\\.)*)"')
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class Histogram:
+    def __init__(self):
+        self.counts = [0] * len(LATENCY_BUCKETS)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        # Non cumulative counts, cumulated when rendered
+        index = bisect.bisect_left(LATENCY_BUCKETS, value)
+        if index < len(self.counts):
+            self.counts[index] += 1
+        self.total += value
+        self.count += 1
+
+
+class Metrics:
+    counters: Dict[Tuple[str, Labels], float] = {}
+    gauges: Dict[Tuple[str, Labels], float] = {}
+    histograms: Dict[Tuple[str, Labels], Histogram] = {}
+
+    @classmethod
+    def reset(cls):
+        """Clear every recorded metric"""
+        cls.counters = {}
+        cls.gauges = {}
+        cls.histograms = {}
+
+    @classmethod
+    def inc(cls, name: str, value: float = 1, **labels: str):
+        """Increment a counter"""
+        key = (name, tuple(sorted(labels.items())))
+        cls.counters[key] = cls.counters.get(key, 0) + value
+
+    @classmethod
+    def set(cls, name: str, value: float, **labels: str):
+        """Set a gauge value"""
+        cls.gauges[(name, tuple(sorted(labels.items())))] = value
+
+    @classmethod
+    def observe(cls, name: str, value: float, **labels: str):
+        """Record a value in a histogram"""
+        key = (name, tuple(sorted(labels.items())))
+        histogram = cls.histograms.get(key)
+        if histogram is None:
+            histogram = cls.histograms[key] = Histogram()
+        histogram.observe(value)
+
+    @classmethod
+    @contextmanager
+    def time(cls, name: str, **labels: str):
+        """Record the duration of the enclosed block in a histogram"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            cls.observe(name, time.perf_counter() - start, **labels)
+
+    @classmethod
+    def render(cls) -> str:
+        """Render every recorded metric in the Prometheus text exposition format"""
+        samples: Dict[str, List[str]] = {}
+        for (name, labels), value in sorted(cls.counters.items()):
+            samples.setdefault(name, []).append(f"{name}{format_labels(labels)} {format_value(value)}")
+        for (name, labels), value in sorted(cls.gauges.items()):
+            samples.setdefault(name, []).append(f"{name}{format_labels(labels)} {format_value(value)}")
+        for (name, labels), histogram in sorted(cls.histograms.items(), key=lambda item: item[0]):
+            lines = samples.setdefault(name, [])
+            cumulative = 0
+            for bound, count in zip(LATENCY_BUCKETS, histogram.counts):
+                cumulative += count
+                lines.append(f"{name}_bucket{format_labels(labels + (('le', f'{bound:g}'),))} {cumulative}")
+            lines.append(f"{name}_bucket{format_labels(labels + (('le', '+Inf'),))} {histogram.count}")
+            lines.append(f"{name}_sum{format_labels(labels)} {format_value(histogram.total)}")
+            lines.append(f"{name}_count{format_labels(labels)} {histogram.count}")
+
+        output = []
+        for name in sorted(samples):
+            metric_type, description = HELP.get(name, ("untyped", name))
+            output.append(f"# HELP {name} {description}")
+            output.append(f"# TYPE {name} {metric_type}")
+            output.extend(samples[name])
+        return "\n".join(output) + "\n"
+
+    @classmethod
+    def merge_textfile(cls, path: Path):
+        """
+        Add the counters and histograms of a previously written textfile to the ones of this run, so they keep
+         growing across runs as Prometheus expects. Gauges only describe the last run and are not merged.
+        :param path: .prom file path written by a previous run
+        """
+        try:
+            content = path.read_text()
+        except FileNotFoundError:
+            return
+        except OSError as error:
+            LOGGER.error(f"Error reading previous metrics from '{path}', counters restart from zero: {error}")
+            return
+
+        buckets: Dict[Tuple[str, Labels], Dict[str, float]] = {}
+        sums: Dict[Tuple[str, Labels], float] = {}
+        for line in content.splitlines():
+            match = SAMPLE_PATTERN.match(line)
+            if line.startswith("#") or match is None:
+                continue
+            name, raw_labels, raw_value = match.groups()
+            try:
+                value = float(raw_value)
+            except ValueError:
+                continue
+            labels = dict((key, unescape_label(raw)) for key, raw in LABEL_PATTERN.findall(raw_labels or ""))
+
+            if HELP.get(name, ("",))[0] == "counter":
+                key = (name, tuple(sorted(labels.items())))
+                cls.counters[key] = cls.counters.get(key, 0) + value
+            elif name.endswith("_bucket") and HELP.get(name[:-len("_bucket")], ("",))[0] == "histogram":
+                bound = labels.pop("le", None)
+                buckets.setdefault((name[:-len("_bucket")], tuple(sorted(labels.items()))), {})[bound] = value
+            elif name.endswith("_sum") and HELP.get(name[:-len("_sum")], ("",))[0] == "histogram":
+                sums[(name[:-len("_sum")], tuple(sorted(labels.items())))] = value
+
+        bounds = [f"{bound:g}" for bound in LATENCY_BUCKETS]
+        for key, cumulative_counts in buckets.items():
+            # Drop histograms written with other buckets, Prometheus handles it as a counter reset
+            if set(cumulative_counts) != set(bounds + ["+Inf"]):
+                LOGGER.warning(f"Previous buckets of '{key[0]}' do not match, restarting it from zero")
+                continue
+            histogram = cls.histograms.get(key)
+            if histogram is None:
+                histogram = cls.histograms[key] = Histogram()
+            previous = 0
+            for index, bound in enumerate(bounds):
+                histogram.counts[index] += int(cumulative_counts[bound] - previous)
+                previous = cumulative_counts[bound]
+            histogram.count += int(cumulative_counts["+Inf"])
+            histogram.total += sums.get(key, 0.0)
+
+    @classmethod
+    def write_textfile(cls, path: Path):
+        """
+        Write the metrics for the node-exporter textfile collector, on top of the totals of the previous file.
+        The file is written next to its destination then renamed so the collector never reads a partial file.
+        :param path: destination .prom file path
+        """
+        cls.merge_textfile(path)
+        tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        try:
+            tmp_path.write_text(cls.render())
+            os.replace(tmp_path, path)
+            LOGGER.debug(f"Metrics written to '{path}'")
+        except OSError as error:
+            LOGGER.error(f"Error writing metrics to '{path}': {error}")
+
+
+def format_labels(labels: Labels) -> str:
+    """Format labels as a Prometheus label set"""
+    if not labels:
+        return ""
+    escaped = (f'{key}="{escape_label(value)}"' for key, value in labels)
+    return "{" + ",".join(escaped) + "}"
+
+
+def escape_label(value: str) -> str:
+    """Escape a label value as required by the exposition format"""
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def unescape_label(value: str) -> str:
+    """Revert the escaping done by escape_label"""
+    return re.sub(r"\\(.)", lambda match: "\n" if match.group(1) == "n" else match.group(1), value)
+
+
+def format_value(value: float) -> str:
+    """Format a sample value without losing precision on large counters"""
+    return str(int(value)) if float(value).is_integer() else repr(float(value))